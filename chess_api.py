@@ -16,6 +16,9 @@ CORS(app)  # Enable CORS for frontend
 # Global Stockfish engine
 engine = None
 
+# Engine resource tuning (ENGINE_POOL_SIZE / ENGINE_INDEX are parsed when the engine starts)
+ENGINE_PIN_CPUS = os.environ.get('ENGINE_PIN_CPUS', '').lower() in ('1', 'true', 'yes')
+
 # OpenAI client
 openai_client = None
 
@@ -196,53 +199,149 @@ def init_openai():
         print(f"Error initializing OpenAI: {e}")
         return False
 
+def env_int(name, default):
+    """Integer from environment variable `name`, or `default` when unset"""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer, got {value!r}")
+
+def engine_pool_size():
+    """Number of engine processes sharing this host (ENGINE_POOL_SIZE)"""
+    pool_size = env_int('ENGINE_POOL_SIZE', 1)
+    if pool_size < 1:
+        raise ValueError(f"ENGINE_POOL_SIZE must be at least 1, got {pool_size}")
+    return pool_size
+
+def available_cpus():
+    """CPUs this process may run on"""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+def available_memory_mb():
+    """Available physical memory in MB (MemAvailable, incl. reclaimable cache), or None if unknown"""
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE') // (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+def engine_cpu_slice(index=None, pool_size=None):
+    """CPUs reserved for engine `index` when the host is split across the pool"""
+    pool_size = pool_size or engine_pool_size()
+    index = env_int('ENGINE_INDEX', None) if index is None else index
+    cpus = available_cpus()
+    if index is None:
+        if pool_size > 1:
+            raise ValueError(f"ENGINE_INDEX is required to pin CPUs with ENGINE_POOL_SIZE={pool_size}")
+        index = 0
+    if not 0 <= index < pool_size:
+        raise ValueError(f"ENGINE_INDEX={index} must be in 0..{pool_size - 1}")
+    if pool_size > len(cpus):
+        raise ValueError(f"ENGINE_POOL_SIZE={pool_size} exceeds the {len(cpus)} available CPUs")
+    per_engine = len(cpus) // pool_size
+    return cpus[index * per_engine:(index + 1) * per_engine]
+
+def tuned_engine_options(cpus=None):
+    """Pick Threads/Hash for one engine from host cores, memory and pool size
+
+    When `cpus` is the engine's pinned slice, Threads is capped at its size.
+    """
+    pool_size = engine_pool_size()
+    threads = len(cpus) if cpus else max(1, len(available_cpus()) // pool_size)
+    threads = env_int('ENGINE_THREADS', threads)
+    if cpus and threads > len(cpus):
+        print(f"Warning: ENGINE_THREADS={threads} exceeds the {len(cpus)} pinned CPUs, using {len(cpus)}")
+        threads = len(cpus)
+    memory = available_memory_mb()
+    # Use at most a quarter of available memory across the pool, as a power of two
+    hash_mb = 16 if memory is None else max(16, min(2048, memory // 4 // pool_size))
+    hash_mb = 1 << (hash_mb.bit_length() - 1)
+    return {'Threads': threads, 'Hash': env_int('ENGINE_HASH_MB', hash_mb)}
+
+def pin_engine(eng, cpus):
+    """Pin every thread of the engine process to `cpus` (Linux only)"""
+    if not hasattr(os, 'sched_setaffinity'):
+        raise RuntimeError("CPU pinning requires os.sched_setaffinity (Linux)")
+    # SubprocessTransport.get_pid() just returns the stored pid, so it is safe off the event loop
+    pid = eng.transport.get_pid()
+    # sched_setaffinity(pid) only affects the thread with that TID, so cover all of them
+    for tid in os.listdir(f'/proc/{pid}/task'):
+        os.sched_setaffinity(int(tid), cpus)
+    print(f"Stockfish pid {pid} pinned to CPUs {cpus}")
+
+def configure_engine(eng, options, cpus=None):
+    """Optionally pin the engine process to `cpus`, then apply supported UCI options"""
+    if cpus:
+        # Pin before setting Threads so the new search threads inherit the mask
+        try:
+            pin_engine(eng, cpus)
+        except Exception as e:
+            print(f"Warning: pinning Stockfish to CPUs {cpus} failed ({e}), some threads may be unpinned")
+    supported = {name: value for name, value in options.items() if name in eng.options}
+    eng.configure(supported)
+    print(f"Stockfish options: {supported}")
+
+def stockfish_paths():
+    """Yield candidate Stockfish binaries for this platform, in preference order"""
+    import platform
+    system = platform.system().lower()
+    
+    # Auto-detect platform and set appropriate Stockfish paths
+    if system == 'linux':
+        paths = ['./stockfish-linux', './stockfish', 'stockfish']
+    elif system == 'darwin':  # macOS
+        paths = ['./stockfish-macos-m1-apple-silicon', './stockfish', 'stockfish']
+    else:  # Windows or other
+        paths = ['./stockfish.exe', './stockfish', 'stockfish']
+    
+    print(f"Platform detected: {system}")
+    print(f"Trying Stockfish paths: {paths}")
+    
+    for path in paths:
+        if os.path.exists(path) or path == 'stockfish':
+            yield path
+
+def open_stockfish():
+    """Start the first candidate Stockfish that runs; returns (engine, path) or (None, None)"""
+    for path in stockfish_paths():
+        try:
+            return chess.engine.SimpleEngine.popen_uci(path), path
+        except Exception as e:
+            print(f"Failed to initialize Stockfish from {path}: {e}")
+    return None, None
+
 def init_stockfish():
     """Initialize Stockfish engine"""
     global engine
-    try:
-        import platform
-        system = platform.system().lower()
-        
-        # Auto-detect platform and set appropriate Stockfish paths
-        stockfish_paths = []
-        
-        if system == 'linux':
-            stockfish_paths = [
-                './stockfish-linux',
-                './stockfish',
-                'stockfish'
-            ]
-        elif system == 'darwin':  # macOS
-            stockfish_paths = [
-                './stockfish-macos-m1-apple-silicon',
-                './stockfish',
-                'stockfish'
-            ]
-        else:  # Windows or other
-            stockfish_paths = [
-                './stockfish.exe',
-                './stockfish',
-                'stockfish'
-            ]
-        
-        print(f"Platform detected: {system}")
-        print(f"Trying Stockfish paths: {stockfish_paths}")
-        
-        for path in stockfish_paths:
-            try:
-                if os.path.exists(path) or path == 'stockfish':
-                    engine = chess.engine.SimpleEngine.popen_uci(path)
-                    print(f"Stockfish initialized successfully from: {path}")
-                    return True
-            except Exception as e:
-                print(f"Failed to initialize Stockfish from {path}: {e}")
-                continue
-        
+    eng, path = open_stockfish()
+    if not eng:
         print("Warning: Stockfish not found, falling back to random moves")
         return False
+    
+    cpus = None
+    if ENGINE_PIN_CPUS:
+        try:
+            cpus = engine_cpu_slice()
+        except ValueError as e:
+            print(f"Warning: CPU pinning disabled ({e})")
+    try:
+        configure_engine(eng, tuned_engine_options(cpus), cpus)
     except Exception as e:
-        print(f"Error initializing Stockfish: {e}")
-        return False
+        print(f"Warning: Stockfish tuning failed ({e}), continuing without tuning")
+    engine = eng
+    print(f"Stockfish initialized successfully from: {path}")
+    return True
 
 def elo_to_depth_and_time(elo):
     """Convert Elo rating to appropriate depth and time limits"""
@@ -641,6 +740,41 @@ def submit_feedback():
         print(f"Feedback submission error: {e}")
         return jsonify({'error': 'Failed to submit feedback'}), 500
 
+def benchmark_engine(path, positions=5, depth=None, time_cap=60.0):
+    """Report nodes/sec and time-to-depth for candidate Threads/Hash configurations
+
+    Searches like get_move (depth limit with a time cap), defaulting to the
+    deepest level the app plays, so latency differs between configurations.
+    """
+    depth = depth or elo_to_depth_and_time(float('inf'))[0]
+    cpus = engine_cpu_slice() if ENGINE_PIN_CPUS else None
+    tuned = tuned_engine_options(cpus)
+    max_threads = len(cpus) if cpus else len(available_cpus())
+    candidates = sorted({(1, 16), (tuned['Threads'], tuned['Hash']),
+                         (max_threads, tuned['Hash']), (max(1, max_threads // 2), tuned['Hash'])})
+    board = chess.Board()
+    boards = []
+    for _ in range(positions):
+        boards.append(board.copy())
+        board.push(random.choice(list(board.legal_moves)))
+
+    print(f"Benchmark: {positions} positions, depth {depth}, time cap {time_cap}s")
+    for threads, hash_mb in candidates:
+        eng = chess.engine.SimpleEngine.popen_uci(path)
+        try:
+            configure_engine(eng, {'Threads': threads, 'Hash': hash_mb}, cpus)
+            nps, latencies = [], []
+            for b in boards:
+                start = time.perf_counter()
+                info = eng.analyse(b, chess.engine.Limit(depth=depth, time=time_cap))
+                latencies.append(time.perf_counter() - start)
+                nps.append(info.get('nps', 0))
+            print(f"Threads={threads:<3} Hash={hash_mb:<5}MB "
+                  f"nps={sum(nps) // len(nps):>10} "
+                  f"latency avg={sum(latencies) / len(latencies):.3f}s max={max(latencies):.3f}s")
+        finally:
+            eng.quit()
+
 def cleanup():
     """Clean up resources"""
     global engine
@@ -649,8 +783,20 @@ def cleanup():
             engine.quit()
         except:
             pass
+        engine = None
 
 if __name__ == '__main__':
+    import sys
+    if '--benchmark' in sys.argv:
+        # python3 chess_api.py --benchmark: compare engine configurations on this host
+        probe, path = open_stockfish()
+        if not probe:
+            print("Error: Stockfish not found")
+            sys.exit(1)
+        probe.quit()
+        benchmark_engine(path)
+        sys.exit(0)
+
     # Initialize Stockfish, OpenAI and Telegram on startup
     init_stockfish()
     init_openai()